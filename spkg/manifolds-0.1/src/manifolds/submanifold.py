@@ -46,11 +46,32 @@ EXAMPLES:
 #                  http://www.gnu.org/licenses/
 #******************************************************************************
 
+from collections import deque
 from sage.structure.sage_object import SageObject
+from sage.symbolic.ring import SR
+from sage.plot.plot import parametric_plot
+from sage.ext.fast_callable import fast_callable
+from sage.rings.real_double import RDF
 from manifold import Manifold
 from chart import Chart
 from diffmapping import DiffMapping
 
+# Symbolic expressions already obtained from strings passed as embedding 
+# functions, the keys being the strings:
+_parsed_functions = {}
+# Keys of _parsed_functions, from the least recently used to the most 
+# recently used one:
+_parsed_keys = deque()
+# Maximum number of expressions kept in _parsed_functions:
+_PARSED_FUNCTIONS_MAX = 128
+
+# Names of the ambient manifolds in which submanifolds can be plotted:
+_PLOTTABLE_AMBIENTS = frozenset(['R2', 'R3'])
+
+# Maximum number of points at which the numerical version of an embedding is
+# evaluated in a single call when plotting: 
+_GRID_BLOCK_SIZE = 4096
+
 class Submanifold(Manifold):
     r"""
     Base class for submanifolds, i.e. manifolds embedded in a differentiable 
@@ -76,9 +97,9 @@ class Submanifold(Manifold):
     - ``ambient_manifold`` -- the ambient manifold
     - ``embedding_functions`` -- the coordinate expression of the embedding in 
       the chart defined above, the arrival chart being ``ambient_chart``: 
-      list of symbolic expressions (or strings if the involved symbols have not
-      been previously defined), each item representing a coordinate 
-      expression
+      list, tuple or any iterable of symbolic expressions (or strings if the 
+      involved symbols have not been previously defined), each item 
+      representing a coordinate expression
     - ``name`` -- (default: None) name given to the submanifold 
     - ``latex_name`` -- (default: None) LaTeX symbol to denote the submanifold
     - ``ambient_chart`` -- (default: None) the chart of the ambient manifold 
@@ -108,6 +129,13 @@ class Submanifold(Manifold):
             sage: h2 = Submanifold(2, 'r ph', 'spher', m, ["sinh(r)*cos(ph)", "sinh(r)*sin(ph)", "cosh(r)"], 'H2')
             sage: h2.def_chart
             chart 'spher' (r, ph)
+
+        The coordinate expressions can be provided by any iterable, for 
+        instance a generator::
+
+            sage: c = Submanifold(1, 'u', 'u', m, (u^k for k in range(1,4)), 'cubic')
+            sage: c.embedding.coord_expression
+            {('u', 'cart'): functions (u, u^2, u^3) on the chart 'u' (u,)}
             
 
  
@@ -115,7 +143,6 @@ class Submanifold(Manifold):
     def __init__(self, n, coord_symbols, chart_name, ambient_manifold,
                  embedding_functions, name=None, latex_name=None, 
                  ambient_chart=None, start_index=0):
-        from sage.symbolic.ring import SR
         Manifold.__init__(self, n, name, latex_name, start_index)
         Chart(self, coord_symbols, chart_name)
         if not isinstance(ambient_manifold, Manifold):
@@ -124,14 +151,380 @@ class Submanifold(Manifold):
         if ambient_chart is None:
             ambient_chart = ambient_manifold.def_chart.name
         n_amb = ambient_manifold.dim
+        embedding_functions = tuple(embedding_functions)
         if len(embedding_functions) != n_amb:
             raise ValueError(str(n_amb) + 
                              " coordinate functions must be provided.")
-        embedding_expressions = [SR(embedding_functions[i]) for i in
-                                 range(n_amb)]
+        embedding_expressions = tuple([_symbolic_expression(func) 
+                                       for func in embedding_functions])
+        self._fast_cache = {} # dict. of the numerical versions of the 
+                              # embedding, the keys being pairs of chart names
+                              # and the values pairs (coordinate expression of
+                              # the embedding, numerical version)
+        self._scalar_cache = {} # same as above, but for the compiled scalar
+                                # versions of the embedding, stored as pairs
+                                # (list of compiled coordinate expressions, 
+                                # function returning the tuple of their values)
+        self._jacobian_cache = {} # same as above, but for the numerical 
+                                  # versions of the embedding Jacobian matrix
+        self._sampler_cache = {} # same as above, but for the functions 
+                                 # sampling the embedding of a curve
+        self._embedding_charts = (chart_name, ambient_chart) # pair of charts
+                                        # in which the embedding is defined
         self.embedding = DiffMapping(self, ambient_manifold, embedding_expressions, 
                                      chart_name, ambient_chart)
 
+    def _get_embedding(self):
+        r"""
+        Return the embedding of the submanifold in the ambient manifold. 
+        """
+        return self._embedding
+
+    def _set_embedding(self, embedding):
+        r"""
+        Set the embedding of the submanifold in the ambient manifold. 
+
+        The numerical versions of the previous embedding and of its Jacobian 
+        matrix, as well as the functions sampling it, are deleted.
+        """
+        self._embedding = embedding
+        self._fast_cache.clear()
+        self._scalar_cache.clear()
+        self._jacobian_cache.clear()
+        self._sampler_cache.clear()
+
+    embedding = property(_get_embedding, _set_embedding, 
+                         doc="embedding in the ambient manifold")
+
+    def _get_fast_embed(self):
+        r"""
+        Return the compiled versions of the coordinate expressions defining
+        the embedding, in the charts in which the submanifold has been 
+        defined (None if they cannot be compiled).
+
+        They are computed at the first call (see :meth:`_scalar_embedding`).
+        """
+        key = self._embedding_charts
+        if key not in self.embedding.coord_expression:
+            return None
+        return self._compiled_embedding(*key)[0]
+
+    _fast_embed = property(_get_fast_embed, 
+                           doc="compiled coordinate expressions of the embedding")
+
+    def _numerical_version(self, cache, chartname, ambient_chart, build):
+        r"""
+        Return some numerical version of the embedding stored in ``cache``, 
+        computing it if necessary.
+
+        The numerical version is computed again if the coordinate expression
+        of the embedding from which it has been obtained has been replaced
+        since (for instance by 
+        :meth:`DiffMapping.new_coord_representation`).
+
+        INPUT:
+
+        - ``cache`` -- the dictionary in which the numerical version is 
+          stored, the keys being pairs of chart names and the values pairs 
+          (coordinate expression of the embedding, numerical version)
+        - ``chartname`` -- name of the chart on the submanifold
+        - ``ambient_chart`` -- name of the chart on the ambient manifold
+        - ``build`` -- function computing the numerical version from the 
+          coordinate expression of the embedding (an instance of 
+          :class:`MultiFunctionChart`)
+
+        OUTPUT:
+
+        - the numerical version
+
+        """
+        key = (chartname, ambient_chart)
+        coord_expression = self.embedding.coord_expression[key]
+        if key not in cache or cache[key][0] is not coord_expression:
+            cache[key] = (coord_expression, build(coord_expression))
+        return cache[key][1]
+
+    def _fast_embedding(self, chartname, ambient_chart):
+        r"""
+        Return a numerical version of the embedding, acting on NumPy arrays.
+
+        The function is computed at the first call and stored for later use,
+        as long as the coordinate expression of the embedding is not changed.
+
+        INPUT:
+
+        - ``chartname`` -- name of the chart on the submanifold
+        - ``ambient_chart`` -- name of the chart on the ambient manifold
+
+        OUTPUT:
+
+        - a function taking as many NumPy arrays as the submanifold dimension 
+          and returning the list of the values of the coordinates in the 
+          chart ``ambient_chart`` of the image points, or None if the 
+          coordinate expression of the embedding cannot be converted for 
+          NumPy (see :func:`_numpy_function`)
+
+        EXAMPLE::
+
+            sage: m = Manifold(3, 'R3')
+            sage: c_cart  = Chart(m, 'x y z', 'cart')
+            sage: t = var('t')
+            sage: h = Submanifold(1, 't', 't', m, [cos(t), sin(t), t], "helix")
+            sage: f = h._fast_embedding('t', 'cart')
+            sage: import numpy
+            sage: f(numpy.array([0.]))
+            [array([ 1.]), array([ 0.]), array([ 0.])]
+            sage: h._fast_embedding('t', 'cart') is f
+            True
+
+        Rational exponents and coefficients are evaluated with true 
+        division::
+
+            sage: c = Submanifold(1, 't', 't', m, [t, t^(3/2), t^2/3], "c")
+            sage: c._fast_embedding('t', 'cart')(numpy.array([4.]))
+            [array([ 4.]), array([ 8.]), array([ 5.33333333])]
+
+        Constant coordinates are returned as arrays as well::
+
+            sage: p = Submanifold(1, 't', 't', m, [cos(t), sin(t), 2], "circle")
+            sage: p._fast_embedding('t', 'cart')(numpy.array([0., 1.]))[2]
+            array([ 2.,  2.])
+
+        The function is updated if the coordinate expression of the embedding
+        is changed::
+
+            sage: h.embedding.new_coord_representation('t', 'cart', [t, 2*t, 3*t])
+            sage: h._fast_embedding('t', 'cart')(numpy.array([1.]))
+            [array([ 1.]), array([ 2.]), array([ 3.])]
+
+        """
+        chart = self.atlas[chartname]
+        return self._numerical_version(self._fast_cache, chartname, 
+                                       ambient_chart, lambda coord_expression:
+                            _numpy_function(chart, coord_expression.functions))
+
+    def _curve_sampler(self, chartname, ambient_chart):
+        r"""
+        Return a function sampling the embedding of a 1-dimensional 
+        submanifold on equally spaced values of the parameter. 
+
+        If the coordinate expression of the embedding involves sines and 
+        cosines of affine functions of the parameter (e.g. a helix), the
+        function computes them with few evaluations of trigonometric 
+        functions (see :func:`_trig_curve_function`); otherwise it evaluates
+        :meth:`_fast_embedding` on the sampling points. The function is 
+        computed at the first call and stored for later use, as long as the 
+        coordinate expression of the embedding is not changed.
+
+        INPUT:
+
+        - ``chartname`` -- name of the chart on the submanifold
+        - ``ambient_chart`` -- name of the chart on the ambient manifold
+
+        OUTPUT:
+
+        - a function ``sample(t_min, t_max, npts, dtype)`` returning the list
+          of the values of the coordinates in the chart ``ambient_chart`` of
+          the images of the ``npts`` equally spaced values of the parameter 
+          between ``t_min`` and ``t_max`` (bounds included), as NumPy arrays 
+          of type ``dtype``, or None if the coordinate expression of the 
+          embedding cannot be converted for NumPy
+
+        EXAMPLE::
+
+            sage: m = Manifold(3, 'R3')
+            sage: c_cart  = Chart(m, 'x y z', 'cart')
+            sage: t = var('t')
+            sage: h = Submanifold(1, 't', 't', m, [cos(t), sin(t), t], "helix")
+            sage: sample = h._curve_sampler('t', 'cart')
+            sage: sample(0., 2., 3, 'float64')
+            [array([ 1.        ,  0.54030231, -0.41614684]), array([ 0.        ,  0.84147098,  0.90929743]), array([ 0.,  1.,  2.])]
+            sage: sample(0, 2, 3, 'float64')
+            [array([ 1.        ,  0.54030231, -0.41614684]), array([ 0.        ,  0.84147098,  0.90929743]), array([ 0.,  1.,  2.])]
+
+        """
+        import numpy
+        def build(coord_expression):
+            sampler = _trig_curve_function(self.atlas[chartname], 
+                                           coord_expression.functions)
+            if sampler is None:
+                func = self._fast_embedding(chartname, ambient_chart)
+                if func is not None:
+                    def sampler(t_min, t_max, npts, dtype):
+                        ts = numpy.linspace(t_min, t_max, npts).astype(dtype)
+                        return _eval_on_grid(func, [ts])
+            return sampler
+        return self._numerical_version(self._sampler_cache, chartname, 
+                                       ambient_chart, build)
+
+    def embedding_jacobian(self, chartname=None, ambient_chart=None):
+        r"""
+        Return the Jacobian matrix of the embedding.
+
+        The Jacobian matrix is computed at the first call and stored for 
+        later use (by the coordinate expression of the embedding).
+
+        INPUT:
+
+        - ``chartname`` -- (default: None) name of the chart on the 
+          submanifold; if none is provided, the submanifold default chart is
+          assumed
+        - ``ambient_chart`` -- (default: None) name of the chart on the 
+          ambient manifold; if none is provided, the ambient manifold default 
+          chart is assumed
+
+        OUTPUT:
+
+        - the matrix of the partial derivatives of the coordinates in the 
+          chart ``ambient_chart`` of the image point with respect to the 
+          coordinates of the chart ``chartname``, the row index labelling 
+          the former and the column index the latter
+
+        EXAMPLE:
+
+            Jacobian matrix of the embedding of a helix in `\RR^3`::
+
+                sage: m = Manifold(3, 'R3')
+                sage: c_cart  = Chart(m, 'x y z', 'cart')
+                sage: t = var('t')
+                sage: h = Submanifold(1, 't', 't', m, [cos(t), sin(t), t], "helix")
+                sage: h.embedding_jacobian()
+                [-sin(t)]
+                [ cos(t)]
+                [      1]
+                sage: h.embedding_jacobian() is h.embedding_jacobian('t', 'cart')
+                True
+
+        """
+        if chartname is None:
+            chartname = self.def_chart.name
+        if ambient_chart is None:
+            ambient_chart = self.ambient_manifold.def_chart.name
+        return self.embedding.coord_expression[(chartname, 
+                                                ambient_chart)].jacobian()
+
+    def _fast_embedding_jacobian(self, chartname, ambient_chart):
+        r"""
+        Return a numerical version of the Jacobian matrix of the embedding, 
+        acting on NumPy arrays.
+
+        The function is computed at the first call and stored for later use,
+        as long as the coordinate expression of the embedding is not changed.
+
+        INPUT:
+
+        - ``chartname`` -- name of the chart on the submanifold
+        - ``ambient_chart`` -- name of the chart on the ambient manifold
+
+        OUTPUT:
+
+        - a function taking as many NumPy arrays as the submanifold dimension 
+          and returning the list of the values of the elements of the Jacobian
+          matrix (see :meth:`embedding_jacobian`), row by row, or None if 
+          they cannot be converted for NumPy (see :func:`_numpy_function`)
+
+        EXAMPLE:
+
+        The values agree with those of :meth:`embedding_jacobian`::
+
+            sage: m = Manifold(3, 'R3')
+            sage: c_cart  = Chart(m, 'x y z', 'cart')
+            sage: t = var('t')
+            sage: h = Submanifold(1, 't', 't', m, [cos(t), sin(t), t], "helix")
+            sage: f = h._fast_embedding_jacobian('t', 'cart')
+            sage: import numpy
+            sage: vals = [v[0] for v in f(numpy.array([1.]))]
+            sage: jac = h.embedding_jacobian().subs(t=1).list()
+            sage: all(abs(vals[i] - float(jac[i])) < 1e-15 for i in range(3))
+            True
+            sage: h._fast_embedding_jacobian('t', 'cart') is f
+            True
+
+        """
+        chart = self.atlas[chartname]
+        return self._numerical_version(self._jacobian_cache, chartname, 
+                                       ambient_chart, lambda coord_expression:
+                    _numpy_function(chart, coord_expression.jacobian().list()))
+
+    def _scalar_embedding(self, chartname, ambient_chart):
+        r"""
+        Return a compiled numerical version of the embedding, acting on 
+        floating-point numbers.
+
+        This version is to be preferred to :meth:`_fast_embedding` when the 
+        embedding is evaluated at a single point many times (e.g. along the 
+        integration of some ODE). It relies on Sage's ``fast_callable``, 
+        which compiles each coordinate expression once for all. The function
+        is computed at the first call and stored for later use, as long as 
+        the coordinate expression of the embedding is not changed. For the 
+        charts in which the submanifold has been defined, the compiled 
+        coordinate expressions are directly available in the attribute 
+        ``_fast_embed``.
+
+        INPUT:
+
+        - ``chartname`` -- name of the chart on the submanifold
+        - ``ambient_chart`` -- name of the chart on the ambient manifold
+
+        OUTPUT:
+
+        - a function taking as many floats as the submanifold dimension and
+          returning the tuple of the coordinates in the chart 
+          ``ambient_chart`` of the image point, or None if the coordinate 
+          expression of the embedding cannot be compiled 
+
+        EXAMPLE::
+
+            sage: m = Manifold(3, 'R3')
+            sage: c_cart  = Chart(m, 'x y z', 'cart')
+            sage: t = var('t')
+            sage: h = Submanifold(1, 't', 't', m, [cos(t), sin(t), t], "helix")
+            sage: f = h._scalar_embedding('t', 'cart')
+            sage: f(0.)
+            (1.0, 0.0, 0.0)
+            sage: h._scalar_embedding('t', 'cart') is f
+            True
+            sage: [f(3.) for f in h._fast_embed] == list(h._scalar_embedding('t', 'cart')(3.))
+            True
+
+        The compiled coordinate expressions follow any change of the 
+        embedding::
+
+            sage: h.embedding = DiffMapping(h, m, [t, 2*t, 3*t], 't', 'cart')
+            sage: [f(1.) for f in h._fast_embed]
+            [1.0, 2.0, 3.0]
+
+        """
+        return self._compiled_embedding(chartname, ambient_chart)[1]
+
+    def _compiled_embedding(self, chartname, ambient_chart):
+        r"""
+        Return the compiled versions of the coordinate expressions of the 
+        embedding, together with the function returning their values.
+
+        This pair is shared by :meth:`_scalar_embedding` and the attribute
+        ``_fast_embed``, so that each coordinate expression is compiled only
+        once.
+
+        INPUT:
+
+        - ``chartname`` -- name of the chart on the submanifold
+        - ``ambient_chart`` -- name of the chart on the ambient manifold
+
+        OUTPUT:
+
+        - pair (list of compiled coordinate expressions, function returned
+          by :meth:`_scalar_embedding`), each element being None if the 
+          coordinate expression of the embedding cannot be compiled
+
+        """
+        chart = self.atlas[chartname]
+        def build(coord_expression):
+            compiled = _compiled_functions(chart, coord_expression.functions)
+            return (compiled, _scalar_function(compiled))
+        return self._numerical_version(self._scalar_cache, chartname, 
+                                       ambient_chart, build)
+
 
     def plot(self, coord_ranges, chartname = None, **kwds):
         r"""
@@ -145,7 +538,12 @@ class Submanifold(Manifold):
            above coordinates are defined; if none is provided, the submanifold
            default chart is assumed. 
          - ``**kwds`` -- (default: None) keywords passed to Sage graphic 
-           routines
+           routines; the keyword ``plot_points`` sets the number of sampling 
+           points along each coordinate (default: 200 for a curve and 40 for
+           a surface) and the keyword ``dtype`` the NumPy floating-point type
+           of the sampling points (default: 'float32' in `\RR^3`, which is 
+           the precision used by the 3D renderers, and 'float64' in `\RR^2`, 
+           which is the precision used by matplotlib)
            
         OUTPUT:
         
@@ -177,33 +575,74 @@ class Submanifold(Manifold):
                 sage: s = Submanifold(1, 't', 't', R2, [t*cos(t), t*sin(t)], "spiral")
                 sage: s.plot([0,40])
 
+            The points where the embedding is singular are skipped::
+
+                sage: c = Submanifold(1, 't', 't', R2, [cos(t)/t, sin(t)/t], "c")
+                sage: c.plot([0,2*pi])
+                Graphics object consisting of 1 graphics primitive
+
         """
-        from sage.plot.plot import parametric_plot
         if chartname is None:
-            chartname = self.def_chart.name
-        amb = self.ambient_manifold.name
-        if amb == 'R3' or amb == 'R2':
-            if 'cart' not in self.ambient_manifold.atlas:
-                raise ValueError("For drawing, " + amb + 
-                                 " Cartesian coordinates must be defined.")
-            coord_functions = \
-                self.embedding.coord_expression[(chartname, 'cart')].functions
+            chart = self.def_chart
+        else:
             chart = self.atlas[chartname]
-            if self.dim == 1:
-                urange = (chart.xx[0], coord_ranges[0], coord_ranges[1])
-                graph = parametric_plot(coord_functions, urange, **kwds)
-            elif self.dim == 2: 
-                urange = (chart.xx[0], coord_ranges[0][0], coord_ranges[0][1])
-                vrange = (chart.xx[1], coord_ranges[1][0], coord_ranges[1][1])
-                graph = parametric_plot(coord_functions, urange, vrange, **kwds)
-            else: 
+        amb = self.ambient_manifold.name
+        if amb in _PLOTTABLE_AMBIENTS:
+            _require_cart_chart(self.ambient_manifold)
+            try:
+                plotter = self._PLOTTERS[self.dim]
+            except KeyError:
                 raise ValueError("The dimension must be at most 2 " + 
                                  "for plotting.")
+            graph = plotter(self, chart, coord_ranges, amb, **kwds)
         else:
             raise NotImplementedError("Plotting is implemented only for " + 
                                       "submanifolds of R^2 or R^3.")
         return graph
 
+    def _plot_curve(self, chart, coord_ranges, amb, **kwds):
+        r"""
+        Plot of a 1-dimensional submanifold; see :meth:`plot` for the 
+        arguments, the chart being passed as an object and not by its name.
+        """
+        # Fast path: the embedding is evaluated numerically on all the 
+        # sampling points at once
+        sampler = self._curve_sampler(chart.name, 'cart')
+        if sampler is not None:
+            graph = _fast_plot_curve(sampler, coord_ranges, amb, **kwds)
+            if graph is not None:
+                return graph
+        # Generic path: sampling performed by Sage plotting functions
+        kwds.pop('dtype', None)
+        coord_functions = \
+            self.embedding.coord_expression[(chart.name, 'cart')].functions
+        urange = (chart.xx[0], coord_ranges[0], coord_ranges[1])
+        return parametric_plot(coord_functions, urange, **kwds)
+
+    def _plot_surface(self, chart, coord_ranges, amb, **kwds):
+        r"""
+        Plot of a 2-dimensional submanifold; see :meth:`plot` for the 
+        arguments, the chart being passed as an object and not by its name.
+        """
+        # Fast path: the embedding is evaluated numerically on the whole
+        # sampling grid at once
+        func = self._fast_embedding(chart.name, 'cart')
+        if func is not None:
+            graph = _fast_plot_surface(func, coord_ranges, amb, **kwds)
+            if graph is not None:
+                return graph
+        # Generic path: sampling performed by Sage plotting functions
+        kwds.pop('dtype', None)
+        coord_functions = \
+            self.embedding.coord_expression[(chart.name, 'cart')].functions
+        xx = chart.xx
+        urange = (xx[0], coord_ranges[0][0], coord_ranges[0][1])
+        vrange = (xx[1], coord_ranges[1][0], coord_ranges[1][1])
+        return parametric_plot(coord_functions, urange, vrange, **kwds)
+
+    # Plotting functions, the keys being the submanifold dimensions:
+    _PLOTTERS = {1: _plot_curve, 2: _plot_surface}
+
 
 #******************************************************************************
 
@@ -278,14 +717,564 @@ class MCurve(Submanifold):
         Submanifold.__init__(self, 1, param_symbols, param_name, 
                              ambient_manifold, embedding_functions, name, 
                              latex_name, ambient_chart)
+        self._ambient_repr = None # pair (key, string representation) of the
+                                  # ambient manifold, the key being the 
+                                  # triple (id, dimension, name); set by _repr_
+
+    def plot(self, param_range, chartname=None, plot_points=200, **kwds):
+        r"""
+        Plot of a curve embedded in `\RR^2` or `\RR^3`
+
+        The embedding is evaluated at once on ``plot_points`` equally spaced
+        values of the parameter, the resulting points being joined by a line.
+
+        INPUT:
+
+         - ``param_range`` -- pair (t_min, t_max) bounding the range of the
+           parameter t along the curve
+         - ``chartname`` -- (default: None) name of the parametrization (chart
+           on the curve) in which the parameter is defined; if none is 
+           provided, the curve default parametrization is assumed. 
+         - ``plot_points`` -- (default: 200) number of sampling points
+         - ``**kwds`` -- (default: None) keywords passed to Sage graphic 
+           routines
+           
+        OUTPUT:
+        
+          - Graphics3d object (ambient manifold = `\RR^3`) or Graphics object
+            (ambient manifold = `\RR^2`)
+
+        EXAMPLES:
+
+            Plot of a helix in `\RR^3`::
+                
+                sage: m = Manifold(3, 'R3')
+                sage: c_cart  = Chart(m, 'x y z', 'cart')
+                sage: t = var('t')
+                sage: h = MCurve('t', 't', m, [cos(t), sin(t), t], "helix")
+                sage: h.plot([0,20], plot_points=400, color='red')
+
+        """
+        return Submanifold.plot(self, param_range, chartname, 
+                                plot_points=plot_points, **kwds)
 
     def _repr_(self):
         r"""
         Special Sage function for the string representation of the object.
+
+        EXAMPLE::
+
+            sage: m = Manifold(3, 'R3')
+            sage: c_cart  = Chart(m, 'x y z', 'cart')
+            sage: t = var('t')
+            sage: h = MCurve('t', 't', m, [cos(t), sin(t), t], "helix")
+            sage: h._repr_()
+            "curve 'helix' on 3-dimensional manifold 'R3'"
+            sage: h.ambient_manifold = Manifold(4, 'R3')
+            sage: h._repr_()
+            "curve 'helix' on 4-dimensional manifold 'R3'"
+
         """
-        description = "curve"
-        if self.name is not None:
-            description += " '%s'" % self.name
-        description += " on " + str(self.ambient_manifold)
-        return description
+        amb = self.ambient_manifold
+        # the string representation of the ambient manifold is recomputed only
+        # if the latter has been renamed or replaced:
+        key = (id(amb), amb.dim, amb.name)
+        if self._ambient_repr is None or self._ambient_repr[0] != key:
+            self._ambient_repr = (key, str(amb))
+        if self.name is None:
+            return "curve on %s" % self._ambient_repr[1]
+        return "curve '%s' on %s" % (self.name, self._ambient_repr[1])
+
+
+#******************************************************************************
+
+def _symbolic_expression(function):
+    r"""
+    Helper function to convert a coordinate function given to 
+    :class:`Submanifold` as a string into a symbolic expression. 
+
+    Other coordinate functions are returned unchanged: they are converted by
+    :class:`MultiFunctionChart`.
+
+    Strings are parsed only once: the resulting expressions are stored in 
+    the module dictionary ``_parsed_functions`` and reused when the same 
+    string is encountered again (e.g. when the same submanifold is 
+    constructed many times). Since the parsing of a string does not depend on
+    the manifolds, the expressions can be safely shared. At most 
+    ``_PARSED_FUNCTIONS_MAX`` expressions are kept, the least recently used 
+    one being discarded first.
+
+    INPUT:
+
+    - ``function`` -- symbolic expression or string
+
+    OUTPUT:
+
+    - symbolic expression if ``function`` is a string, ``function`` itself
+      otherwise
+
+    """
+    if isinstance(function, basestring):
+        if function in _parsed_functions:
+            _parsed_keys.remove(function)
+        else:
+            if len(_parsed_keys) >= _PARSED_FUNCTIONS_MAX:
+                del _parsed_functions[_parsed_keys.popleft()]
+            _parsed_functions[function] = SR(function)
+        _parsed_keys.append(function)
+        return _parsed_functions[function]
+    return function
+
+def _require_cart_chart(manifold):
+    r"""
+    Helper function to check that Cartesian coordinates, i.e. a chart named 
+    'cart', are defined on a manifold, as required for plotting in it.
+
+    INPUT:
+
+    - ``manifold`` -- the manifold (`\RR^2` or `\RR^3`) to be checked
+
+    """
+    if 'cart' not in manifold.atlas:
+        raise ValueError("For drawing, " + manifold.name + 
+                         " Cartesian coordinates must be defined.")
+
+def _numpy_function(chart, coord_functions):
+    r"""
+    Helper function to convert some coordinate expressions into a function 
+    acting on NumPy arrays.
+
+    The source code of a Python function evaluating the expressions is 
+    generated and compiled once for all (see :func:`_numpy_code`), so that 
+    the resulting function evaluates the expressions on a whole array of 
+    coordinate values in a single (vectorized) call. 
+
+    INPUT:
+
+    - ``chart`` -- the chart whose coordinates are the arguments of the 
+      expressions
+    - ``coord_functions`` -- list (or tuple) of symbolic expressions 
+      involving the coordinates of ``chart``
+
+    OUTPUT:
+
+    - a function taking as many NumPy arrays as there are coordinates in 
+      ``chart`` and returning the list of the values of the expressions, or 
+      None if some expression cannot be converted 
+
+    """
+    try:
+        xx = [x._sympy_() for x in chart.xx]
+        expressions = [f._sympy_() for f in coord_functions]
+    except (AttributeError, NotImplementedError, TypeError):
+        return None
+    return _numpy_code(xx, expressions)
+
+def _numpy_code(args, expressions):
+    r"""
+    Helper function to generate and compile the source code of a Python 
+    function evaluating some SymPy expressions on NumPy arrays. 
+
+    The arguments of the generated function are the symbols ``args`` 
+    themselves, so that no argument unpacking is involved. If there are 
+    several expressions, their common subexpressions are first eliminated by
+    SymPy's ``cse``, so that each of them is evaluated only once (e.g. 
+    ``sin(u)`` in the embedding `(\sin u \cos v, \sin u \sin v, \cos u)`
+    of the sphere). For this example, the generated code is essentially::
+
+        def _embedding(u, v):
+            _cse0 = sin(u)
+            return [_cse0*cos(v), _cse0*sin(v), cos(u)]
 
+    the functions ``sin`` and ``cos`` being those of NumPy. The constant 
+    expressions are broadcast to the shape of the first argument, so that 
+    all the values are arrays of the same shape. 
+
+    INPUT:
+
+    - ``args`` -- list of SymPy symbols, the arguments of the function
+    - ``expressions`` -- list of SymPy expressions involving ``args``
+
+    OUTPUT:
+
+    - a function taking as many NumPy arrays (of the same shape) as there 
+      are symbols in ``args`` and returning the list of the values of the 
+      expressions, as arrays of that shape, or None if some expression 
+      cannot be converted 
+
+    """
+    import __future__
+    import numpy
+    from sympy import cse, numbered_symbols
+    from sympy.utilities.lambdify import NUMPY_DEFAULT, NUMPY_TRANSLATIONS
+    try:
+        from sympy.printing.numpy import NumPyPrinter
+    except ImportError: # older versions of SymPy
+        from sympy.printing.lambdarepr import NumPyPrinter
+    code = NumPyPrinter().doprint
+    # Namespace of the generated code, with the NumPy versions of the 
+    # functions, as set up by SymPy's lambdify for the module 'numpy':
+    namespace = {'numpy': numpy}
+    eval(compile("from numpy import *", '<embedding>', 'exec'), namespace)
+    namespace.update(NUMPY_DEFAULT)
+    for (sympy_name, numpy_name) in NUMPY_TRANSLATIONS.items():
+        if hasattr(numpy, numpy_name):
+            namespace[sympy_name] = getattr(numpy, numpy_name)
+    try:
+        if len(expressions) > 1:
+            (replacements, expressions) = cse(expressions, 
+                                          symbols=numbered_symbols('_cse'))
+        else:
+            replacements = []
+        source = "def _embedding(%s):\n" % ", ".join([str(x) for x in args])
+        for (symbol, subexpression) in replacements:
+            source += "    %s = %s\n" % (symbol, code(subexpression))
+        zero = "numpy.zeros_like(%s)" % args[0]
+        values = []
+        for expr in expressions:
+            if expr.free_symbols:
+                values.append(code(expr))
+            else:
+                values.append("%s + (%s)" % (zero, code(expr)))
+        source += "    return [%s]\n" % ", ".join(values)
+        # The printer writes rationals as integer ratios (e.g. t**(3/2)), 
+        # hence the generated code must be compiled with true division:
+        eval(compile(source, '<embedding>', 'exec', 
+                     __future__.division.compiler_flag, True), namespace)
+    except (AttributeError, NameError, NotImplementedError, SyntaxError, 
+            TypeError):
+        return None
+    return namespace['_embedding']
+
+def _trig_curve_function(chart, coord_functions):
+    r"""
+    Helper function to convert some coordinate expressions depending on a 
+    single parameter `t` into a function sampling them on equally spaced 
+    values of `t`, the sines and cosines of affine functions of `t` being 
+    computed by means of the angle addition formulas. 
+
+    Let `\theta = a t + b` be the argument of some sine or cosine, `a` and 
+    `b` being numbers. For `t_k = t_0 + k h` (`0\leq k < N`), we have 
+    `\theta_k = \theta_0 + k a h`. Writing `k = m B + j`, with `B` of the 
+    order of `\sqrt{N}` and `0\leq j < B`, `\sin\theta_k` and 
+    `\cos\theta_k` are obtained from the sines and cosines of 
+    `\theta_0 + m B a h` and `j a h` by
+
+    .. MATH::
+
+        \sin(\alpha + \beta) = \sin\alpha\cos\beta + \cos\alpha\sin\beta
+        \qquad
+        \cos(\alpha + \beta) = \cos\alpha\cos\beta - \sin\alpha\sin\beta
+
+    i.e. with `4\sqrt{N}` evaluations of trigonometric functions instead of 
+    `2N`, the remaining work being multiply-adds. Contrary to a recurrence
+    from one sample to the next, this involves a single addition formula
+    for each sample, so that the rounding errors do not accumulate. 
+
+    INPUT:
+
+    - ``chart`` -- a chart with a single coordinate `t`
+    - ``coord_functions`` -- list (or tuple) of symbolic expressions 
+      involving `t`
+
+    OUTPUT:
+
+    - a function ``sample(t_min, t_max, npts, dtype)`` returning the list of 
+      the values of the expressions at the ``npts`` equally spaced values of
+      `t` between ``t_min`` and ``t_max`` (bounds included) as NumPy arrays 
+      of type ``dtype``, or None if the expressions involve no sine nor 
+      cosine of `t`, or some sine or cosine whose argument is not an affine 
+      function of `t` with numerical coefficients, or if they cannot be 
+      converted for NumPy 
+
+    """
+    import numpy
+    from sympy import sin, cos, numbered_symbols
+    try:
+        t = chart.xx[0]._sympy_()
+        expressions = [f._sympy_() for f in coord_functions]
+    except (AttributeError, NotImplementedError, TypeError):
+        return None
+    trig_functions = set()
+    for expr in expressions:
+        trig_functions.update(expr.atoms(sin, cos))
+    symbols = numbered_symbols('_trig')
+    angles = {}  # the keys are the arguments of the trigonometric functions,
+                 # the values the symbols standing for their sine and cosine
+    substitutions = {}
+    for trig in trig_functions:
+        theta = trig.args[0]
+        if t not in theta.free_symbols:
+            continue
+        if theta not in angles:
+            (a, b) = (theta.diff(t), theta.subs(t, 0))
+            if not (a.is_number and b.is_number):
+                return None
+            angles[theta] = (float(a), float(b), next(symbols), next(symbols))
+        (a, b, s, c) = angles[theta]
+        if trig.func is sin:
+            substitutions[trig] = s
+        else:
+            substitutions[trig] = c
+    if not angles:
+        return None
+    angles = list(angles.values())
+    args = [t]
+    for (a, b, s, c) in angles:
+        args += [s, c]
+    func = _numpy_code(args, [expr.xreplace(substitutions) 
+                              for expr in expressions])
+    if func is None:
+        return None
+    def sample(t_min, t_max, npts, dtype):
+        if npts > 1:
+            h = float(t_max - t_min) / (npts - 1)
+        else:
+            h = 0.
+        nb = int(numpy.ceil(numpy.sqrt(npts)))  # block length
+        (m, j) = (numpy.arange((npts + nb - 1) // nb), numpy.arange(nb))
+        grid = [numpy.linspace(t_min, t_max, npts).astype(dtype)]
+        for (a, b, s, c) in angles:
+            alpha = a*t_min + b + m*(nb*a*h)
+            beta = j*(a*h)
+            (sin_a, cos_a) = (numpy.sin(alpha), numpy.cos(alpha))
+            (sin_b, cos_b) = (numpy.sin(beta), numpy.cos(beta))
+            sin_theta = numpy.outer(sin_a, cos_b) + numpy.outer(cos_a, sin_b)
+            cos_theta = numpy.outer(cos_a, cos_b) - numpy.outer(sin_a, sin_b)
+            grid.append(sin_theta.ravel()[:npts].astype(dtype))
+            grid.append(cos_theta.ravel()[:npts].astype(dtype))
+        return _eval_on_grid(func, grid)
+    return sample
+
+def _compiled_functions(chart, coord_functions):
+    r"""
+    Helper function to compile some coordinate expressions into functions 
+    acting on floating-point numbers.
+
+    The compilation is performed by Sage's ``fast_callable`` with the domain
+    ``RDF``, so that the resulting functions are evaluated at C level, 
+    without any symbolic substitution.
+
+    INPUT:
+
+    - ``chart`` -- the chart whose coordinates are the arguments of the 
+      expressions
+    - ``coord_functions`` -- list (or tuple) of symbolic expressions 
+      involving the coordinates of ``chart``
+
+    OUTPUT:
+
+    - list of functions, each of them taking as many floats as there are 
+      coordinates in ``chart`` and returning the value of the corresponding
+      expression, or None if some expression cannot be compiled 
+
+    """
+    xx = tuple(chart.xx)
+    try:
+        return [fast_callable(f, vars=xx, domain=RDF) for f in coord_functions]
+    except (NotImplementedError, TypeError, ValueError):
+        return None
+
+def _scalar_function(compiled):
+    r"""
+    Helper function to gather some compiled coordinate expressions into a 
+    single function acting on floating-point numbers.
+
+    INPUT:
+
+    - ``compiled`` -- list of compiled coordinate expressions, as returned
+      by :func:`_compiled_functions`, or None
+
+    OUTPUT:
+
+    - a function taking as many floats as the arguments of the compiled 
+      expressions and returning the tuple of their values, or None if 
+      ``compiled`` is None
+
+    """
+    if compiled is None:
+        return None
+    def func(*coords):
+        return tuple([f(*coords) for f in compiled])
+    return func
+
+def _eval_on_grid(func, grid):
+    r"""
+    Helper function to evaluate a function returned by 
+    :func:`_numpy_function` on a grid of coordinate values. 
+
+    The results are written in preallocated arrays. Large grids are 
+    evaluated by blocks of ``_GRID_BLOCK_SIZE`` points, so that the 
+    intermediate arrays created by NumPy during the evaluation (e.g. the 
+    common subexpressions) remain small enough to stay in the processor 
+    cache. The floating-point errors (e.g. division by zero) are ignored: 
+    the corresponding values are infinite or NaN. 
+
+    INPUT:
+
+    - ``func`` -- function returned by :func:`_numpy_function`
+    - ``grid`` -- list of NumPy arrays, all of the same shape and 
+      floating-point type, containing the values of each coordinate at the 
+      grid points
+
+    OUTPUT:
+
+    - list of NumPy arrays of floats, of the same shape and type as the items
+      of ``grid``, or None if the evaluation failed (e.g. because some function 
+      is not known to NumPy)
+
+    """
+    import numpy
+    shape = grid[0].shape
+    dtype = grid[0].dtype
+    flat_grid = [numpy.ravel(coord) for coord in grid]
+    npts = flat_grid[0].size
+    values = None
+    try:
+        with numpy.errstate(all='ignore'):
+            for start in range(0, npts, _GRID_BLOCK_SIZE):
+                end = start + _GRID_BLOCK_SIZE
+                block = func(*[coord[start:end] for coord in flat_grid])
+                if values is None:
+                    values = [numpy.empty(npts, dtype=dtype) for val in block]
+                for (resu, val) in zip(values, block):
+                    resu[start:end] = val
+    except (AttributeError, NameError, TypeError, ValueError):
+        return None
+    return [resu.reshape(shape) for resu in values]
+
+def _fast_plot_curve(sampler, param_range, amb, plot_points=200, 
+                     dtype=None, **kwds):
+    r"""
+    Helper function for :meth:`Submanifold.plot`: plot of a curve obtained by
+    a vectorized evaluation of the embedding on the sampled parameter range.
+
+    INPUT:
+
+    - ``sampler`` -- function sampling the embedding, giving the Cartesian 
+      coordinates of the image points (cf. :meth:`Submanifold._curve_sampler`)
+    - ``param_range`` -- pair (t_min, t_max) bounding the parameter range
+    - ``amb`` -- name of the ambient manifold ('R2' or 'R3')
+    - ``plot_points`` -- (default: 200) number of sampling points (at least 2)
+    - ``dtype`` -- (default: None) NumPy floating-point type of the sampling 
+      points; if none is provided, 'float32' is used in `\RR^3` and 
+      'float64' in `\RR^2`
+    - ``**kwds`` -- keywords passed to Sage graphic routines
+
+    OUTPUT:
+
+    - Graphics3d or Graphics object, or None if the embedding cannot be 
+      evaluated on the sampling points, in which case the plot must be 
+      performed by Sage's ``parametric_plot``; the curve is interrupted at 
+      the sampling points where the embedding is not finite
+
+    """
+    import numpy
+    from sage.plot.line import line
+    from sage.plot.plot3d.shapes2 import line3d
+    if plot_points < 2:
+        raise ValueError("The number of plot points must be at least 2.")
+    if dtype is None:
+        if amb == 'R3':
+            dtype = 'float32'
+        else:
+            dtype = 'float64'
+    values = sampler(float(param_range[0]), float(param_range[1]), 
+                     plot_points, dtype)
+    if values is None:
+        return None
+    # The coordinates are gathered in a single contiguous array of shape 
+    # (plot_points, 2 or 3), which is converted to the lists of points 
+    # expected by Sage graphic routines in a single C-level pass: 
+    points = numpy.column_stack(values)
+    # The curve is split into the runs of consecutive finite points:
+    finite = numpy.isfinite(points).all(axis=1)
+    edges = numpy.diff(numpy.concatenate(([0], finite.astype(int), [0])))
+    (starts, ends) = (numpy.flatnonzero(edges == 1), 
+                      numpy.flatnonzero(edges == -1))
+    if amb == 'R3':
+        plot_line = line3d
+    else:
+        plot_line = line
+    graph = None
+    for (start, end) in zip(starts, ends):
+        if end - start < 2:
+            continue
+        piece = plot_line(points[start:end].tolist(), **kwds)
+        if graph is None:
+            graph = piece
+        else:
+            graph += piece
+    return graph
+
+def _fast_plot_surface(func, coord_ranges, amb, plot_points=40, 
+                       dtype='float32', **kwds):
+    r"""
+    Helper function for :meth:`Submanifold.plot`: plot of a surface obtained 
+    by a vectorized evaluation of the embedding on the sampling grid.
+
+    INPUT:
+
+    - ``func`` -- numerical version of the embedding, giving the Cartesian 
+      coordinates of the image points (cf. :meth:`Submanifold._fast_embedding`)
+    - ``coord_ranges`` -- list of pairs (u_min, u_max) for each coordinate
+      u on the surface
+    - ``amb`` -- name of the ambient manifold ('R2' or 'R3')
+    - ``plot_points`` -- (default: 40) number of sampling points along each 
+      coordinate, or pair of such numbers (each of them being at least 2)
+    - ``dtype`` -- (default: 'float32') NumPy floating-point type of the 
+      sampling points
+    - ``**kwds`` -- keywords passed to Sage graphic routines
+
+    OUTPUT:
+
+    - Graphics3d object, or None if the ambient manifold is not `\RR^3` or 
+      if the embedding cannot be evaluated on the sampling grid, in which 
+      case the plot must be performed by Sage's ``parametric_plot``; the 
+      faces having some vertex where the embedding is not finite are omitted
+
+    """
+    import numpy
+    from sage.plot.plot3d.index_face_set import IndexFaceSet
+    if amb != 'R3':
+        return None
+    if isinstance(plot_points, (list, tuple)):
+        (nu, nv) = plot_points
+    else:
+        nu = nv = plot_points
+    if nu < 2 or nv < 2:
+        raise ValueError("The number of plot points along each coordinate " + 
+                         "must be at least 2.")
+    u = numpy.linspace(float(coord_ranges[0][0]), float(coord_ranges[0][1]), 
+                       nu).astype(dtype)
+    v = numpy.linspace(float(coord_ranges[1][0]), float(coord_ranges[1][1]), 
+                       nv).astype(dtype)
+    values = _eval_on_grid(func, numpy.meshgrid(u, v, indexing='ij'))
+    if values is None:
+        return None
+    # The Cartesian coordinates of the grid points are kept as three 
+    # contiguous arrays (one per coordinate), which are turned into the 
+    # vertex list in a single C-level pass: 
+    (x, y, z) = values
+    points = numpy.column_stack((x.ravel(), y.ravel(), z.ravel()))
+    # Quadrilateral faces of the grid, vertex (i,j) having the index i*nv+j:
+    ind = numpy.arange(nu*nv).reshape(nu, nv)
+    faces = numpy.dstack((ind[:-1,:-1], ind[:-1,1:], ind[1:,1:], 
+                          ind[1:,:-1])).reshape(-1, 4)
+    finite = numpy.isfinite(points).all(axis=1)
+    if not finite.all():
+        # The non-finite vertices and the faces involving them are removed,
+        # the remaining vertices being renumbered:
+        faces = faces[finite[faces].all(axis=1)]
+        if faces.size == 0:
+            return None
+        new_index = numpy.cumsum(finite) - 1
+        faces = new_index[faces]
+        points = points[finite]
+    points = points.tolist()
+    faces = faces.tolist()
+    surface = IndexFaceSet(faces, points, **kwds)
+    # viewer options (e.g. aspect_ratio, frame, axes) are stored as in 
+    # Sage's parametric_plot3d:
+    surface._set_extra_kwds(kwds)
+    return surface